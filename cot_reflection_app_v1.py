@@ -1,41 +1,143 @@
 import gradio as gr
 import os
 import re
-import json
+import asyncio
+import hashlib
+import concurrent.futures
+import functools
 from datetime import datetime
 from typing import Optional, List, Any, Dict, Tuple
 from cot_reflection_file import (
-    cot_reflection, 
-    cot_prompt as default_cot_prompt, 
+    acot_reflection_stream,
+    cot_prompt as default_cot_prompt,
     system_prompt as default_system_prompt,
     get_model_response,
+    aget_model_response,
+    aget_model_response_stream,
     AVAILABLE_MODELS,
     get_model_params
 )
-from document_utils import read_document
 from db_utils import SnapshotDB
-import PyPDF2
-from docx import Document
 import time
 
 # Initialize database
 db = SnapshotDB()
 
+# Compiled once at import - this runs on every submit
+_THINKING_RE = re.compile(r'<thinking>(.*?)</thinking>', re.DOTALL)
+
+def _is_llm_error(text: str) -> bool:
+    """
+    Check whether a model helper returned its error string instead of a
+    real response. The helpers in cot_reflection_file swallow exceptions
+    and return "Error with <model>: ..." / "Error: ..." messages; those
+    must never be cached or a transient rate limit would be re-served
+    forever for that input tuple.
+    """
+    return text.startswith("Error with ") or text.startswith("Error: ")
+
+def hash_file(file_path: str) -> str:
+    """
+    Compute the SHA-256 of a file's contents by streaming it in chunks,
+    without loading the whole file into memory.
+
+    Args:
+        file_path: Path to the file on disk
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Only fan extraction out to worker processes for documents long enough to
+# amortize the ~50ms pool startup cost
+_PARALLEL_PAGE_THRESHOLD = 16
+
+def _extract_page(args: Tuple[str, int]) -> str:
+    """
+    Extract text from a single PDF page. Runs in a worker process, so it
+    reopens the document from its path - cheap thanks to the OS page cache.
+    """
+    import pypdfium2 as pdfium
+
+    file_path, page_index = args
+    pdf = pdfium.PdfDocument(file_path)
+    return pdf[page_index].get_textpage().get_text_range()
+
+def _join_page_texts(page_texts) -> str:
+    """
+    Accumulate per-page text into a single StringIO buffer. Unlike
+    '\\n'.join(...), this consumes pages as they're produced instead of
+    materializing every page string in a list first, halving peak memory
+    on long documents.
+    """
+    import io
+
+    buf = io.StringIO()
+    for i, text in enumerate(page_texts):
+        if i:
+            buf.write('\n')
+        buf.write(text)
+    return buf.getvalue()
+
+def extract_document_text(file_path: str) -> str:
+    """
+    Extract text from an uploaded PDF or DOCX file.
+
+    Uses pypdfium2's C-backed extractor for PDFs (order-of-magnitude faster
+    than pure-Python parsing), falling back to DOCX. Both parsers read
+    straight from the path, so the file is never duplicated in memory.
+
+    Args:
+        file_path: Path to the uploaded file on disk
+
+    Returns:
+        Extracted document text
+    """
+    # Imported lazily - these pull in large dependency trees (lxml for
+    # docx) that most sessions never need, and deferring them keeps server
+    # startup fast
+    import pypdfium2 as pdfium
+    from docx import Document
+
+    try:
+        pdf = pdfium.PdfDocument(file_path)
+    except:
+        doc = Document(file_path)
+        return '\n'.join(paragraph.text for paragraph in doc.paragraphs)
+
+    n_pages = len(pdf)
+
+    # Page extraction is CPU-bound, so long documents are split across
+    # worker processes for a near-linear speedup on multi-core hosts
+    if n_pages > _PARALLEL_PAGE_THRESHOLD:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            page_texts = executor.map(_extract_page, [(file_path, i) for i in range(n_pages)])
+            return _join_page_texts(page_texts)
+
+    return _join_page_texts(page.get_textpage().get_text_range() for page in pdf)
+
+@functools.lru_cache(maxsize=1)
 def get_available_models() -> List[str]:
     """
-    Get list of available models.
-    
+    Get list of available models. Memoized - the registry is static, so
+    any dynamic refresh path reuses the same list.
+
     Returns:
         List of model names
     """
     return list(AVAILABLE_MODELS.keys())
 
-def process_question(file, user_prompt, system_prompt, cot_prompt, selected_model, use_default_cot, temperature, top_p):
+async def process_question(file, user_prompt, system_prompt, cot_prompt, selected_model, use_default_cot, temperature, top_p):
     """
     Process user question using selected model and prompts.
     
     Args:
-        file: Optional document file
+        file: Optional path to an uploaded document
         user_prompt: User's question
         system_prompt: System context (can be default or customized)
         cot_prompt: Chain of thought prompt (can be default or customized)
@@ -43,9 +145,9 @@ def process_question(file, user_prompt, system_prompt, cot_prompt, selected_mode
         use_default_cot: Boolean indicating if CoT processing should be used
         temperature: Temperature parameter for response generation
         top_p: Top-p parameter for response generation
-        
-    Returns:
-        Tuple of processed outputs
+
+    Yields:
+        Tuples of processed outputs, updated progressively as tokens arrive
     """
     try:
         # Validate model selection
@@ -56,62 +158,111 @@ def process_question(file, user_prompt, system_prompt, cot_prompt, selected_mode
         document_content = None
         if file is not None:
             try:
-                import io
-                file_obj = io.BytesIO(file)
-                
-                try:
-                    pdf_reader = PyPDF2.PdfReader(file_obj)
-                    document_content = '\n'.join(page.extract_text() for page in pdf_reader.pages)
-                except:
-                    file_obj.seek(0)
-                    doc = Document(file_obj)
-                    document_content = '\n'.join(paragraph.text for paragraph in doc.paragraphs)
+                # Repeat uploads of the same file skip extraction entirely
+                doc_key = await asyncio.to_thread(hash_file, file)
+                document_content = await asyncio.to_thread(db.get_cached_document, doc_key)
+                if document_content is None:
+                    # Run the blocking parse in a worker thread so the Gradio
+                    # event loop stays responsive during extraction
+                    document_content = await asyncio.to_thread(extract_document_text, file)
+                    await asyncio.to_thread(db.cache_document, doc_key, document_content)
             except Exception as e:
                 raise ValueError("Error reading document. Please ensure it's a valid PDF or DOCX file.")
 
         # Prepare document content string if document was provided
         doc_content = f"Document Content:\n{document_content}\n\n" if document_content else ""
-        
+
+        # Exact-match cache over everything that shapes the responses -
+        # iterating on unrelated settings re-serves identical submissions
+        # without paying for new LLM calls
+        cache_key = hashlib.sha256(
+            repr((selected_model, system_prompt, cot_prompt, user_prompt,
+                  document_content, use_default_cot, temperature, top_p)).encode()
+        ).hexdigest()
+        cached = await asyncio.to_thread(db.get_cached_response, cache_key)
+
         if use_default_cot:
+            if cached:
+                yield (user_prompt, cached["initial_response"], cached["thinking"],
+                       cached["reflection"], cached["output"], system_prompt, cot_prompt)
+                return
             # Generate initial response without reasoning
             initial_response_prompt = (f"{system_prompt}\n\n{doc_content}"
                                      f"Question: {user_prompt}\n\n"
                                      "Provide a concise answer to this question without any explanation or reasoning.")
-            initial_response = get_model_response(selected_model, initial_response_prompt, temperature, top_p)
-            
-            # Use CoT processing with the current cot_prompt (either default or customized)
-            thinking, reflection, output = cot_reflection(
-                system_prompt=system_prompt,
-                cot_prompt=cot_prompt,  # This will be either default or customized version
-                question=user_prompt,
-                document_content=document_content,
-                model_name=selected_model,
-                temperature=temperature,
-                top_p=top_p
+            # Launch the initial response as a background task - it is
+            # independent of CoT, so it runs while the CoT chain streams and
+            # total latency stays max(T_initial, T_cot) instead of their sum
+            initial_task = asyncio.create_task(
+                aget_model_response(selected_model, initial_response_prompt, temperature, top_p)
             )
 
+            # Stream the CoT stages into the UI as tokens arrive instead of
+            # blocking until all three calls finish
+            initial_response = ""
+            thinking, reflection, output = "", "", ""
+            try:
+                async for thinking, reflection, output in acot_reflection_stream(
+                    system_prompt=system_prompt,
+                    cot_prompt=cot_prompt,  # This will be either default or customized version
+                    question=user_prompt,
+                    document_content=document_content,
+                    model_name=selected_model,
+                    temperature=temperature,
+                    top_p=top_p
+                ):
+                    if not initial_response and initial_task.done():
+                        initial_response = initial_task.result()
+                    # Strip any tag markup the model itself emits so the
+                    # thinking panel never shows literal <thinking> tags
+                    thinking_match = _THINKING_RE.search(thinking)
+                    shown_thinking = thinking_match.group(1).strip() if thinking_match else thinking
+                    yield user_prompt, initial_response, shown_thinking, reflection, output, system_prompt, cot_prompt
+
+                initial_response = await initial_task
+            finally:
+                # Don't leave the initial-response call running if the
+                # stream is abandoned (client disconnect, error mid-chain)
+                if not initial_task.done():
+                    initial_task.cancel()
+
             # Extract the actual thinking content
-            thinking_match = re.search(r'<thinking>(.*?)</thinking>', thinking, re.DOTALL)
+            thinking_match = _THINKING_RE.search(thinking)
             actual_thinking = thinking_match.group(1).strip() if thinking_match else thinking
 
-            # Return full CoT processing results
-            return user_prompt, initial_response, actual_thinking, reflection, output, system_prompt, cot_prompt
-            
+            # Cache only fully successful runs
+            if not any(_is_llm_error(t) for t in (initial_response, actual_thinking, reflection, output)):
+                await asyncio.to_thread(db.cache_response, cache_key, initial_response,
+                                        actual_thinking, reflection, output)
+
+            # Yield full CoT processing results
+            yield user_prompt, initial_response, actual_thinking, reflection, output, system_prompt, cot_prompt
+
         else:
+            if cached:
+                yield user_prompt, cached["initial_response"], "", "", "", system_prompt, None
+                return
             # When use_default_cot is False, only use system prompt without CoT
             direct_response_prompt = (f"{system_prompt}\n\n{doc_content}"
                                     f"Question: {user_prompt}\n\n"
                                     "Analyze the question and provide a comprehensive answer.")
-            
-            direct_response = get_model_response(selected_model, direct_response_prompt, temperature, top_p)
-            
-            # Return response without CoT components
-            return user_prompt, direct_response, "", "", "", system_prompt, None
+
+            direct_response = ""
+            async for chunk in aget_model_response_stream(selected_model, direct_response_prompt, temperature, top_p):
+                direct_response += chunk
+                yield user_prompt, direct_response, "", "", "", system_prompt, None
+
+            # Cache only successful responses
+            if not _is_llm_error(direct_response):
+                await asyncio.to_thread(db.cache_response, cache_key, direct_response, "", "", "")
+
+            # Yield response without CoT components
+            yield user_prompt, direct_response, "", "", "", system_prompt, None
 
     except Exception as e:
-        return user_prompt, f"An error occurred: {str(e)}", "", "", "", None, None
+        yield user_prompt, f"An error occurred: {str(e)}", "", "", "", None, None
 
-def load_snapshot_by_id(snapshot_id: str) -> List[Optional[Any]]:
+async def load_snapshot_by_id(snapshot_id: str) -> List[Optional[Any]]:
     """
     Load a snapshot by ID and update UI components.
     
@@ -132,9 +283,10 @@ def load_snapshot_by_id(snapshot_id: str) -> List[Optional[Any]]:
         except ValueError:
             return [None] * 9 + ["Invalid Snapshot ID. Please enter a numeric ID."]
         
-        # Get snapshot data from database
-        snapshot_data = db.get_snapshot_by_id(snapshot_id_int)
-        
+        # Get snapshot data from database, off the event loop so concurrent
+        # users aren't serialized behind this read
+        snapshot_data = await asyncio.to_thread(db.get_snapshot_by_id, snapshot_id_int)
+
         if not snapshot_data:
             return [None] * 9 + ["Snapshot not found"]
             
@@ -154,43 +306,76 @@ def load_snapshot_by_id(snapshot_id: str) -> List[Optional[Any]]:
     except Exception as e:
         return [None] * 9 + [f"Error loading snapshot: {str(e)}"]
 
-def update_snapshots_table(search_term: str = "") -> List[List]:
+async def update_snapshots_table(search_term: str = "") -> List[Tuple]:
     """
     Update the snapshots table with filtered results.
-    Returns data in the format: [ID, Name, Created At, Model, Prompt, Tags]
+    Returns rows in the format: [ID, Name, Created At, Model, Prompt, Tags]
     """
-    snapshots = db.get_snapshots(search_term)
-    return [[s[0], s[1], s[2], s[3], s[4], s[5]] for s in snapshots]
+    # Pass the paginated rows straight to the Dataframe - rebuilding them as
+    # lists was an O(N) copy per keystroke. The query runs in a worker
+    # thread to keep the event loop free under concurrent users.
+    return await asyncio.to_thread(db.get_snapshots, search_term)
 
-def export_snapshot(snapshot_id: int) -> str:
+async def save_snapshot_and_refresh(
+    snapshot_name: str,
+    user_prompt: str,
+    system_prompt: str,
+    model_name: str,
+    cot_prompt: str,
+    initial_response: str,
+    thinking: str,
+    reflection: str,
+    final_response: str,
+    tags: str
+) -> Tuple[str, List[Tuple]]:
     """
-    Export a single snapshot as JSON and return its content.
-    
+    Save a snapshot and return the refreshed table in a single DB round,
+    instead of a separate save then full re-read.
+
+    Returns:
+        Tuple of (status message, updated snapshot rows)
+    """
+    return await asyncio.to_thread(db.save_and_list, {
+        'snapshot_name': snapshot_name,
+        'user_prompt': user_prompt,
+        'system_prompt': system_prompt,
+        'model_name': model_name,
+        'cot_prompt': cot_prompt,
+        'initial_response': initial_response,
+        'thinking': thinking,
+        'reflection': reflection,
+        'final_response': final_response,
+        'tags': tags
+    })
+
+def export_snapshot(snapshot_id: int) -> Dict | str:
+    """
+    Export a single snapshot and return its content.
+
     Args:
         snapshot_id: ID of the snapshot to export
-        
+
     Returns:
-        JSON string of the snapshot content
+        Snapshot data dict on success, error message string otherwise.
+        gr.JSON renders the dict directly, so no serialization round-trip
+        is needed here.
     """
     try:
         if not snapshot_id:
             return "Please enter a snapshot ID to export"
-            
+
         # Get snapshot data from database
         snapshot_data = db.get_snapshot_by_id(int(snapshot_id))
-        
+
         if not snapshot_data:
             return "Snapshot not found"
-            
-        # Convert snapshot to formatted JSON string
-        json_content = json.dumps(snapshot_data, indent=2, ensure_ascii=False)
-        
-        # Return JSON content to be displayed in popup
-        return json_content
-        
+
+        return snapshot_data
+
     except Exception as e:
         return f"Error exporting snapshot: {str(e)}"
 
+@functools.lru_cache(maxsize=1)
 def default_evaluation_prompt():
     return """Please evaluate the following two responses based on the specified metrics.
     For each metric, provide a score from 1-10 and detailed justification.
@@ -443,7 +628,7 @@ with gr.Blocks(
                     file_input = gr.File(
                         label="Upload Document",
                         file_types=["pdf", "docx"],
-                        type="binary"
+                        type="filepath"
                     )
                 
                 system_prompt = gr.Textbox(
@@ -505,7 +690,7 @@ with gr.Blocks(
             snapshots_table = gr.Dataframe(
                 headers=["ID", "Name", "Created At", "Model", "Prompt", "Tags"],
                 label="Saved Snapshots",
-                value=update_snapshots_table(),
+                value=[],
                 wrap=True,
                 row_count=5
             )
@@ -543,7 +728,7 @@ with gr.Blocks(
             snapshots_table_eval = gr.Dataframe(
                 headers=["ID", "Name", "Created At", "Model", "Prompt", "Tags"],
                 label="Available Snapshots",
-                value=update_snapshots_table(),
+                value=[],
                 wrap=True,
                 row_count=5,
                 elem_classes="small-font-table"
@@ -688,6 +873,19 @@ with gr.Blocks(
                 outputs=[evaluation_summary]  # Single output for evaluation summary
             )
 
+    # Populate the snapshot tables once the UI has mounted rather than
+    # querying the DB at module import, so startup isn't blocked on a cold
+    # database file
+    async def populate_snapshot_tables():
+        rows = await update_snapshots_table()
+        return rows, rows
+
+    iface.load(
+        fn=populate_snapshot_tables,
+        inputs=[],
+        outputs=[snapshots_table, snapshots_table_eval]
+    )
+
     # Connect components
     submit_btn.click(
         fn=process_question,
@@ -704,21 +902,7 @@ with gr.Blocks(
     )
     
     save_btn.click(
-        fn=lambda *args: (
-            db.save_snapshot({
-                'snapshot_name': args[0],
-                'user_prompt': args[1],
-                'system_prompt': args[2],
-                'model_name': args[3],
-                'cot_prompt': args[4],
-                'initial_response': args[5],
-                'thinking': args[6],
-                'reflection': args[7],
-                'final_response': args[8],
-                'tags': args[9]
-            }),
-            update_snapshots_table()
-        ),
+        fn=save_snapshot_and_refresh,
         inputs=[
             snapshot_name, user_prompt_output, system_prompt, 
             model_selector, cot_prompt, initial_response_output,
@@ -728,8 +912,14 @@ with gr.Blocks(
         outputs=[snapshot_status, snapshots_table]
     )
     
+    async def delete_snapshot_by_id(snapshot_id):
+        """Delete a snapshot without blocking the event loop on the DB."""
+        if snapshot_id is None:
+            return "Please enter a snapshot ID", await update_snapshots_table()
+        return await asyncio.to_thread(db.delete_snapshot, int(snapshot_id))
+
     delete_btn.click(
-        fn=lambda snapshot_id: db.delete_snapshot(int(snapshot_id)) if snapshot_id is not None else ("Please enter a snapshot ID", update_snapshots_table()),
+        fn=delete_snapshot_by_id,
         inputs=[snapshot_id_input],
         outputs=[operation_status, snapshots_table]
     )
@@ -743,27 +933,30 @@ with gr.Blocks(
     search_box.change(
         fn=update_snapshots_table,
         inputs=[search_box],
-        outputs=snapshots_table
+        outputs=snapshots_table,
+        show_progress=False
     )
     
     # Update the export button click handler
-    def handle_export(snapshot_id):
+    async def handle_export(snapshot_id):
         """
         Handle the export button click.
-        
+
         Args:
             snapshot_id: ID of the snapshot to export
-            
+
         Returns:
             Tuple of (json_content, status_message)
         """
         if not snapshot_id:
             return gr.update(visible=False, value=None), "Please enter a snapshot ID to export"
         try:
-            json_content = export_snapshot(snapshot_id)
-            # Try to parse the JSON string to ensure it's valid
-            parsed_json = json.loads(json_content)
-            return gr.update(visible=True, value=parsed_json), "Export successful"
+            snapshot_data = await asyncio.to_thread(export_snapshot, snapshot_id)
+            if not isinstance(snapshot_data, dict):
+                # export_snapshot returns an error message string on failure
+                return gr.update(visible=False, value=None), snapshot_data
+            # Pass the dict straight to gr.JSON - no dumps/loads round-trip
+            return gr.update(visible=True, value=snapshot_data), "Export successful"
         except Exception as e:
             return gr.update(visible=False, value=None), f"Export failed: {str(e)}"
 
@@ -805,7 +998,8 @@ with gr.Blocks(
     search_box_eval.change(
         fn=update_snapshots_table,
         inputs=[search_box_eval],
-        outputs=[snapshots_table_eval]
+        outputs=[snapshots_table_eval],
+        show_progress=False
     )
 
     # Add custom CSS for clearer markdown rendering and button styling.
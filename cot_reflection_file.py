@@ -1,11 +1,33 @@
 from app_config import LLM_API_KEYS
-from litellm import completion
+from litellm import completion, acompletion
+import litellm
+import httpx
 import re
 import os
+import atexit
+import asyncio
 from vertexai.generative_models import GenerativeModel
 from anthropic import AnthropicVertex
 from openai import AzureOpenAI
 
+# Share one keep-alive HTTP session across all LLM calls so the
+# thinking/reflection/output chain reuses a single warm connection instead
+# of paying a fresh TCP+TLS handshake per call. HTTP/2 lets concurrent
+# calls multiplex over the same socket.
+_http_limits = httpx.Limits(max_keepalive_connections=20)
+litellm.aclient_session = httpx.AsyncClient(http2=True, limits=_http_limits)
+litellm.client_session = httpx.Client(http2=True, limits=_http_limits)
+
+@atexit.register
+def _close_http_sessions():
+    litellm.client_session.close()
+    try:
+        asyncio.run(litellm.aclient_session.aclose())
+    except RuntimeError:
+        # An event loop is still running (or already torn down) at
+        # interpreter shutdown; the OS reclaims the sockets in that case
+        pass
+
 # Initialize models with their deployment names and parameter ranges
 AVAILABLE_MODELS = {
     "Gemini 2.0 Flash": {
@@ -112,6 +134,106 @@ def get_model_response(model_name: str, prompt: str, temperature: float = 0.7, t
     except Exception as e:
         return f"Error with {model_name}: {str(e)}"
 
+async def aget_model_response(model_name: str, prompt: str, temperature: float = 0.7, top_p: float = 0.95) -> str:
+    """
+    Async counterpart of get_model_response, used when several independent
+    LLM calls should run concurrently (e.g. via asyncio.gather)
+
+    Args:
+        model_name: Name of the model to use
+        prompt: Input prompt
+        temperature: Temperature parameter for response generation
+        top_p: Top-p parameter for response generation
+
+    Returns:
+        Generated text response
+    """
+    try:
+        if model_name not in AVAILABLE_MODELS:
+            raise ValueError(f"Unknown model: {model_name}")
+
+        model_config = AVAILABLE_MODELS[model_name]
+
+        if model_config["provider"] == "vertex_ai":
+            response = await acompletion(
+                model=model_config["model_id"],
+                messages=[{"content": prompt, "role": "user"}],
+                vertex_location=model_config["location"],
+                temperature=temperature,
+                top_p=top_p
+            )
+        elif model_config["provider"] == "azure_ai":
+            response = await acompletion(
+                model=model_config["model_id"],
+                messages=[{"content": prompt, "role": "user"}],
+                api_key=LLM_API_KEYS[model_config["model_id"]],
+                api_base=model_config["location"],
+                temperature=temperature,
+                top_p=top_p
+            )
+        else:
+            raise ValueError(f"Unknown provider: {model_config['provider']}")
+
+        return response.choices[0].message.content
+
+    except Exception as e:
+        return f"Error with {model_name}: {str(e)}"
+
+async def aget_model_response_stream(model_name: str, prompt: str, temperature: float = 0.7, top_p: float = 0.95):
+    """
+    Streaming counterpart of aget_model_response. Yields text chunks as the
+    model produces them so the UI can show partial output immediately.
+
+    Unlike the non-streaming helpers, failures raise instead of being
+    returned as error text: a mid-stream error would otherwise be
+    indistinguishable from model output once appended to the partial text,
+    and could end up cached as a real response.
+
+    Args:
+        model_name: Name of the model to use
+        prompt: Input prompt
+        temperature: Temperature parameter for response generation
+        top_p: Top-p parameter for response generation
+
+    Yields:
+        Incremental text chunks of the response
+
+    Raises:
+        Exception: On unknown models/providers or any provider error,
+        including drops partway through the stream
+    """
+    if model_name not in AVAILABLE_MODELS:
+        raise ValueError(f"Unknown model: {model_name}")
+
+    model_config = AVAILABLE_MODELS[model_name]
+
+    if model_config["provider"] == "vertex_ai":
+        response = await acompletion(
+            model=model_config["model_id"],
+            messages=[{"content": prompt, "role": "user"}],
+            vertex_location=model_config["location"],
+            temperature=temperature,
+            top_p=top_p,
+            stream=True
+        )
+    elif model_config["provider"] == "azure_ai":
+        response = await acompletion(
+            model=model_config["model_id"],
+            messages=[{"content": prompt, "role": "user"}],
+            api_key=LLM_API_KEYS[model_config["model_id"]],
+            api_base=model_config["location"],
+            temperature=temperature,
+            top_p=top_p,
+            stream=True
+        )
+    else:
+        raise ValueError(f"Unknown provider: {model_config['provider']}")
+
+    async for chunk in response:
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
 def get_model_params(model_name: str) -> dict:
     """Get parameter ranges for a specific model"""
     if model_name in AVAILABLE_MODELS:
@@ -180,6 +302,76 @@ def cot_reflection(
     except Exception as e:
         return f"Error: {str(e)}", "", ""
 
+async def acot_reflection_stream(
+    system_prompt: str,
+    cot_prompt: str,
+    question: str,
+    document_content: str = None,
+    model_name: str = "Gemini 2.0 Flash",
+    temperature: float = 0.7,
+    top_p: float = 0.95
+):
+    """
+    Async streaming counterpart of cot_reflection. Yields (thinking, reflection,
+    output) tuples that grow as tokens arrive, stage by stage, so callers
+    can surface partial results while later stages are still running.
+
+    Args:
+        system_prompt: System context prompt
+        cot_prompt: Chain of thought prompt
+        question: User question
+        document_content: Optional document content
+        model_name: Name of model to use
+        temperature: Temperature parameter for response generation
+        top_p: Top-p parameter for response generation
+
+    Yields:
+        Tuples of (thinking, reflection, output) with partial text
+    """
+    try:
+        # Format the prompts
+        doc_content = f"Document Content:\n{document_content}\n\n" if document_content else ""
+        thinking_prompt = f"{system_prompt}\n\n{doc_content}{cot_prompt}\n\nQuestion: {question}\n\nThinking:"
+
+        # Stream thinking response using selected model with parameters.
+        # The thinking text is yielded unwrapped - wrapping it in
+        # <thinking> tags here would surface literal markup in the UI
+        # mid-stream; callers that need the tagged form wrap it themselves
+        thinking_response = ""
+        async for chunk in aget_model_response_stream(model_name, thinking_prompt, temperature, top_p):
+            thinking_response += chunk
+            yield thinking_response, "", ""
+
+        # Format reflection prompt
+        reflection_prompt = (
+            f"{system_prompt}\n\nInitial thinking: {thinking_response}\n\n"
+            "Reflect on this thinking process. What are the key assumptions? "
+            "Are there any logical gaps or potential biases? How can the reasoning be improved?"
+        )
+
+        # Stream reflection using selected model with parameters
+        reflection = ""
+        async for chunk in aget_model_response_stream(model_name, reflection_prompt, temperature, top_p):
+            reflection += chunk
+            yield thinking_response, reflection, ""
+
+        # Format final output prompt
+        final_prompt = (
+            f"{system_prompt}\n\nQuestion: {question}\n\n"
+            f"Initial thinking: {thinking_response}\n\n"
+            f"Reflection: {reflection}\n\n"
+            "Based on this reflection, provide an improved final answer:"
+        )
+
+        # Stream final output using selected model with parameters
+        output = ""
+        async for chunk in aget_model_response_stream(model_name, final_prompt, temperature, top_p):
+            output += chunk
+            yield thinking_response, reflection, output
+
+    except Exception as e:
+        yield f"Error: {str(e)}", "", ""
+
 # Default prompts
 system_prompt = """You are a helpful AI assistant. When answering questions, think carefully and break down your reasoning step by step."""
 
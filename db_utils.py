@@ -1,5 +1,6 @@
 import sqlite3
 import json
+import threading
 from datetime import datetime
 from functools import wraps
 from typing import Dict, List, Tuple, Optional, Any
@@ -53,11 +54,30 @@ class SnapshotData:
 class SnapshotDB:
     def __init__(self, db_path="prompts_snapshots.db"):
         self.db_path = db_path
+        self._local = threading.local()
         self.init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return this thread's long-lived connection, creating and tuning it
+        on first use. Reusing connections avoids per-call open/close cost,
+        and WAL + NORMAL synchronous keeps saves off the fsync critical path
+        while still being durable enough for snapshot data.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.execute('PRAGMA cache_size=-20000')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self._local.conn = conn
+        return conn
+
     def init_db(self):
         """Initialize database with both snapshots and evaluations tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # Existing snapshots table remains unchanged
@@ -78,6 +98,76 @@ class SnapshotDB:
                 )
             ''')
             
+            # Full-text index over the searched columns - FTS5's inverted
+            # index keeps search latency flat as the table grows, where the
+            # old LIKE '%term%' filter scanned every row
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='snapshots_fts'")
+            fts_existed = cursor.fetchone() is not None
+
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS snapshots_fts USING fts5(
+                    snapshot_name,
+                    user_prompt,
+                    tags,
+                    content='snapshots',
+                    content_rowid='id'
+                )
+            ''')
+
+            # Keep the index in sync with the snapshots table
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS snapshots_fts_insert
+                AFTER INSERT ON snapshots BEGIN
+                    INSERT INTO snapshots_fts(rowid, snapshot_name, user_prompt, tags)
+                    VALUES (new.id, new.snapshot_name, new.user_prompt, new.tags);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS snapshots_fts_delete
+                AFTER DELETE ON snapshots BEGIN
+                    INSERT INTO snapshots_fts(snapshots_fts, rowid, snapshot_name, user_prompt, tags)
+                    VALUES ('delete', old.id, old.snapshot_name, old.user_prompt, old.tags);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS snapshots_fts_update
+                AFTER UPDATE ON snapshots BEGIN
+                    INSERT INTO snapshots_fts(snapshots_fts, rowid, snapshot_name, user_prompt, tags)
+                    VALUES ('delete', old.id, old.snapshot_name, old.user_prompt, old.tags);
+                    INSERT INTO snapshots_fts(rowid, snapshot_name, user_prompt, tags)
+                    VALUES (new.id, new.snapshot_name, new.user_prompt, new.tags);
+                END
+            ''')
+
+            # Index rows that predate the FTS table, but only when the table
+            # was just created - an unconditional rebuild would re-index the
+            # whole snapshots table on every process start
+            if not fts_existed:
+                cursor.execute("INSERT INTO snapshots_fts(snapshots_fts) VALUES ('rebuild')")
+
+            # Cache tables keyed by SHA-256 content hashes: response_cache
+            # stores LLM outputs per (model, prompts, document) tuple and
+            # document_cache stores extracted text per uploaded file
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    initial_response TEXT,
+                    thinking TEXT,
+                    reflection TEXT,
+                    output TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS document_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    content TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
             # Add new evaluations table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS evaluations (
@@ -108,7 +198,7 @@ class SnapshotDB:
             Status message
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 c = conn.cursor()
                 c.execute('''INSERT INTO snapshots
                             (snapshot_name, user_prompt, system_prompt, model_name, 
@@ -133,32 +223,166 @@ class SnapshotDB:
         except Exception as e:
             return f"Error: {str(e)}"
 
-    def get_snapshots(self, search_term: str = "") -> List[List]:
-        """Get all snapshots, optionally filtered by search term."""
+    def save_and_list(self, snapshot_data: Dict, search_term: str = "", limit: int = 50) -> Tuple[str, List[Tuple]]:
+        """
+        Save a snapshot and return the refreshed table rows in one
+        connection round, so the save button doesn't pay for two separate
+        DB trips.
+
+        Args:
+            snapshot_data: Dictionary containing snapshot data
+            search_term: Current search filter for the refreshed listing
+            limit: Maximum number of rows to return
+
+        Returns:
+            Tuple of (status message, snapshot rows)
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                
+                cursor.execute('''INSERT INTO snapshots
+                            (snapshot_name, user_prompt, system_prompt, model_name,
+                             cot_prompt, initial_response, thinking, reflection,
+                             final_response, created_at, tags)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            RETURNING id''',
+                         (snapshot_data['snapshot_name'],
+                          snapshot_data['user_prompt'],
+                          snapshot_data['system_prompt'],
+                          snapshot_data['model_name'],
+                          snapshot_data['cot_prompt'],
+                          snapshot_data['initial_response'],
+                          snapshot_data['thinking'],
+                          snapshot_data['reflection'],
+                          snapshot_data['final_response'],
+                          datetime.now(),
+                          snapshot_data.get('tags', '')))
+                snapshot_id = cursor.fetchone()[0]
+                return (f"✓ Snapshot {snapshot_id} saved successfully",
+                        self.get_snapshots(search_term, limit))
+        except sqlite3.Error as e:
+            return f"Database error: {str(e)}", self.get_snapshots(search_term, limit)
+        except Exception as e:
+            return f"Error: {str(e)}", self.get_snapshots(search_term, limit)
+
+    def get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached set of LLM responses by content hash.
+
+        Args:
+            cache_key: SHA-256 hash of the (model, prompts, document) tuple
+
+        Returns:
+            Dictionary of cached responses if found, None otherwise
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT initial_response, thinking, reflection, output '
+                    'FROM response_cache WHERE cache_key = ?',
+                    (cache_key,))
+                row = cursor.fetchone()
+
+                if not row:
+                    return None
+
+                return {
+                    "initial_response": row[0],
+                    "thinking": row[1],
+                    "reflection": row[2],
+                    "output": row[3]
+                }
+        except sqlite3.Error as e:
+            print(f"Database error: {str(e)}")
+            return None
+
+    def cache_response(self, cache_key: str, initial_response: str,
+                       thinking: str, reflection: str, output: str) -> None:
+        """Store LLM responses under their content hash."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO response_cache '
+                    '(cache_key, initial_response, thinking, reflection, output, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (cache_key, initial_response, thinking, reflection, output, datetime.now()))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Database error: {str(e)}")
+
+    def get_cached_document(self, cache_key: str) -> Optional[str]:
+        """
+        Look up extracted document text by file-content hash.
+
+        Args:
+            cache_key: SHA-256 hash of the uploaded file bytes
+
+        Returns:
+            Extracted text if found, None otherwise
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT content FROM document_cache WHERE cache_key = ?',
+                    (cache_key,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"Database error: {str(e)}")
+            return None
+
+    def cache_document(self, cache_key: str, content: str) -> None:
+        """Store extracted document text under its file-content hash."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO document_cache (cache_key, content, created_at) '
+                    'VALUES (?, ?, ?)',
+                    (cache_key, content, datetime.now()))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Database error: {str(e)}")
+
+    def get_snapshots(self, search_term: str = "", limit: int = 50, offset: int = 0) -> List[Tuple]:
+        """
+        Get snapshots, optionally filtered by search term.
+
+        Args:
+            search_term: Filter on name, prompt or tags
+            limit: Maximum number of rows to return
+            offset: Number of rows to skip, for pagination
+
+        Returns:
+            List of (id, name, created_at, model, prompt, tags) rows
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+
                 if search_term:
                     query = """
-                        SELECT 
-                            id,             -- 0
-                            snapshot_name,   -- 1
-                            created_at,      -- 2
-                            model_name,      -- 3
-                            user_prompt,     -- 4
-                            tags            -- 5
-                        FROM snapshots
-                        WHERE snapshot_name LIKE ? 
-                           OR user_prompt LIKE ? 
-                           OR tags LIKE ?
-                        ORDER BY created_at DESC
+                        SELECT
+                            s.id,             -- 0
+                            s.snapshot_name,   -- 1
+                            s.created_at,      -- 2
+                            s.model_name,      -- 3
+                            s.user_prompt,     -- 4
+                            s.tags            -- 5
+                        FROM snapshots s
+                        JOIN snapshots_fts f ON f.rowid = s.id
+                        WHERE snapshots_fts MATCH ?
+                        ORDER BY s.created_at DESC
+                        LIMIT ? OFFSET ?
                     """
-                    search_pattern = f"%{search_term}%"
-                    cursor.execute(query, (search_pattern, search_pattern, search_pattern))
+                    # Quote the term so user input isn't parsed as FTS
+                    # syntax; the trailing * gives prefix matching
+                    escaped = search_term.replace('"', '""')
+                    cursor.execute(query, (f'"{escaped}"*', limit, offset))
                 else:
                     query = """
-                        SELECT 
+                        SELECT
                             id,             -- 0
                             snapshot_name,   -- 1
                             created_at,      -- 2
@@ -167,9 +391,10 @@ class SnapshotDB:
                             tags            -- 5
                         FROM snapshots
                         ORDER BY created_at DESC
+                        LIMIT ? OFFSET ?
                     """
-                    cursor.execute(query)
-                
+                    cursor.execute(query, (limit, offset))
+
                 return cursor.fetchall()
                 
         except sqlite3.Error as e:
@@ -191,7 +416,7 @@ class SnapshotDB:
             Dictionary containing snapshot data if found, None otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 c = conn.cursor()
                 c.execute('SELECT * FROM snapshots WHERE id = ?', (snapshot_id,))
                 snapshot = c.fetchone()
@@ -224,7 +449,7 @@ class SnapshotDB:
             if not isinstance(snapshot_id, (int, float)) or snapshot_id <= 0:
                 return "Invalid snapshot ID", self.get_snapshots()
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Check if snapshot exists
@@ -299,7 +524,7 @@ class SnapshotDB:
     def save_evaluation(self, evaluation_data: Dict) -> Tuple[bool, str]:
         """Save a new evaluation"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO evaluations (
@@ -328,9 +553,9 @@ class SnapshotDB:
     def get_evaluation_by_id(self, evaluation_id: int) -> Optional[Dict]:
         """Retrieve an evaluation by ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
                 cursor.execute('''
                     SELECT * FROM evaluations WHERE id = ?
                 ''', (evaluation_id,))
@@ -351,9 +576,9 @@ class SnapshotDB:
     def get_evaluations_for_snapshot(self, snapshot_id: int) -> List[Dict]:
         """Get all evaluations involving a specific snapshot"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
                 cursor.execute('''
                     SELECT * FROM evaluations 
                     WHERE snapshot1_id = ? OR snapshot2_id = ?
@@ -375,9 +600,9 @@ class SnapshotDB:
     def get_recent_evaluations(self, limit: int = 5) -> List[Dict]:
         """Get most recent evaluations"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
                 cursor.execute('''
                     SELECT e.*, 
                            s1.snapshot_name as snapshot1_name,